@@ -1,28 +1,15 @@
-import requests
 import argparse
 import json
 from io import StringIO,BytesIO
 import gzip
 import csv
 import codecs
-from selectorlib import Extractor
-from bs4 import BeautifulSoup
 import re
-from warcio.archiveiterator import ArchiveIterator
 import time
+import extractors
 
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-#Usage
-#python project/commoncrawler.py -d https://insightfellows.com/
-#here we are just parsing out our command line arguments and storing the result in our domain variable.
-# parse the command line arguments
-ap = argparse.ArgumentParser()
-ap.add_argument("-d","--domain",required=True,help="The domain to target ie. https://insightfellows.com/")
-args = vars(ap.parse_args())
-
-domain = args['domain']
+# requests and bs4 are imported inside the functions that need them, so that
+# importing this module (e.g. from main.py or a worker) stays cheap.
 
 #this is a list of all of the Common Crawl indices that we can query for snapshots of the target domain.
 # list of available indices
@@ -34,6 +21,10 @@ index_list = ["2025-21"]
 #
 
 def search_domain(domain, index):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     record_list = []
     print(f"[*] Trying target domain: {domain}")
     print(f"[*] Trying index: {index}")
@@ -70,6 +61,7 @@ def search_domain(domain, index):
 #
 
 def download_page(record):
+    import requests
     #if record['status']!='200':
     #    return
     offset, length = int(record['offset']), int(record['length'])
@@ -134,7 +126,8 @@ def download_page(record):
 #
 # Extract links from the HTML  
 #
-def extract_product_links(html_content,link_list):
+def extract_product_links(html_content,link_list,domain):
+    from bs4 import BeautifulSoup
 
     parser = BeautifulSoup(html_content,"html.parser")
        
@@ -155,6 +148,7 @@ def extract_product_links(html_content,link_list):
     return link_list
 
 def extract_product_data(html_content):
+    from bs4 import BeautifulSoup
 
     # Create an Extractor by reading from the YAML file
     #e = Extractor.from_yaml_file('PokemonShop.yml')
@@ -184,55 +178,82 @@ def record_status_bad(record_dict):
         return True
 
 def record_is_product(record_dict):
-    if '/dp/' in record_dict['url']:
+    # Product URL shape depends on the retailer, e.g. /dp/ on Amazon, /ip/ on Walmart
+    if extractors.is_product_url(record_dict['url']):
         return True
 
-#Check for bad status
-initial_record_list = search_domain(domain, index_list)
-cleaned_record_list = list(filter(record_status_bad,initial_record_list))
-
-#Check for product pages
-record_list = list(filter(record_is_product,cleaned_record_list))
-
-print("Total pages with products: ",len(record_list))
-
-link_list   = []
-with open('AmazonProducts.json','a') as outfile:
-    #for url in urllist.read().splitlines():
-        #data = scrape(url) 
-        #print("data: ",data)
-    #for i in range(1):
-    for i in range(len(record_list)):
-        record = record_list[i]
-        html_content =  download_page(record)
-        #print('html: ',html_content)
-        if html_content is None:
-            continue
-        title,price,rating = extract_product_data(html_content)
-        url = record['url']
-        #htmlfile = open("html_content_%s"%i,"w")
-        #htmlfile.writelines(url)
-        #htmlfile.write("\n")
-        #html_out = BeautifulSoup(html_content,"html.parser")
-        #htmlfile.write(html_out.prettify())
-        #htmlfile.close()
-
-        ##Get links of external products on the page
-        #link_list = extract_product_links(html_content,link_list)
-
-        #Because I want to see all products with "dp" in their url
-        if url:
-            #title = product_info[0]
-            #price = product_info[1]
-            if not title:
-                title = url.strip("https://www.amazon.com/").split("/dp")[0]
-            jsonObject = {'title':title,'price': price,'url':url,'ratings':rating}
-            print("title: ",title)
-            print("price: ",price)
-            print("ratings: ",rating)
-            print("url: ",url)
-            json.dump(jsonObject,outfile)
-            outfile.write("\n")
+def find_product_records(domain, index_list):
+    # Query every index and keep the 200-status product pages
+    record_list = []
+    for index in index_list:
+        record_list += search_domain(domain, index)
+
+    print(f"[*] Total raw records: {len(record_list)}")
+
+    cleaned_list = list(filter(record_status_bad, record_list))
+    product_records = list(filter(record_is_product, cleaned_list))
+
+    print(f"[*] Product pages found: {len(product_records)}")
+    return product_records
+
+# Only crawl when run as a script, so main.py can import the helpers above
+if __name__ == "__main__":
+    #Usage
+    #python project/commoncrawler.py -d https://insightfellows.com/
+    #here we are just parsing out our command line arguments and storing the result in our domain variable.
+    # parse the command line arguments
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-d","--domain",required=True,help="The domain to target ie. https://insightfellows.com/")
+    args = vars(ap.parse_args())
+
+    domain = args['domain']
+
+    #Check for bad status
+    initial_record_list = search_domain(domain, index_list)
+    cleaned_record_list = list(filter(record_status_bad,initial_record_list))
+
+    #Check for product pages
+    record_list = list(filter(record_is_product,cleaned_record_list))
+
+    print("Total pages with products: ",len(record_list))
+
+    link_list   = []
+    with open('AmazonProducts.json','a') as outfile:
+        #for url in urllist.read().splitlines():
+            #data = scrape(url) 
+            #print("data: ",data)
+        #for i in range(1):
+        for i in range(len(record_list)):
+            record = record_list[i]
+            html_content =  download_page(record)
+            #print('html: ',html_content)
+            if html_content is None:
+                continue
+            title,price,rating = extract_product_data(html_content)
+            url = record['url']
+            #htmlfile = open("html_content_%s"%i,"w")
+            #htmlfile.writelines(url)
+            #htmlfile.write("\n")
+            #html_out = BeautifulSoup(html_content,"html.parser")
+            #htmlfile.write(html_out.prettify())
+            #htmlfile.close()
+
+            ##Get links of external products on the page
+            #link_list = extract_product_links(html_content,link_list,domain)
+
+            #Because I want to see all products with "dp" in their url
+            if url:
+                #title = product_info[0]
+                #price = product_info[1]
+                if not title:
+                    title = url.strip("https://www.amazon.com/").split("/dp")[0]
+                jsonObject = {'title':title,'price': price,'url':url,'ratings':rating}
+                print("title: ",title)
+                print("price: ",price)
+                print("ratings: ",rating)
+                print("url: ",url)
+                json.dump(jsonObject,outfile)
+                outfile.write("\n")
 
 
 #print ("[*] Total external links discovered: %d" % len(link_list))
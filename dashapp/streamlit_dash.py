@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import json
+import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
@@ -17,7 +18,17 @@ Easily track pricing trends, inflation signals, and product segments over time.
 @st.cache_data
 def load_data():
     try:
-        with open('../data/products.json', 'r') as f:
+        # Prefer the cleaned output of `python main.py dashboard-prep`, unless a
+        # newer crawl/save has replaced products.json since it was prepared
+        path = '../data/products.json'
+        prepared = '../data/dashboard_products.json'
+        if os.path.exists(prepared):
+            if os.path.getmtime(prepared) >= os.path.getmtime(path):
+                path = prepared
+            else:
+                st.warning("⚠️ dashboard_products.json is older than products.json; showing the raw data. "
+                           "Re-run `python main.py dashboard-prep` to refresh it.")
+        with open(path, 'r') as f:
             data = json.load(f)
         df = pd.DataFrame(data)
 
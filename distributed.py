@@ -0,0 +1,141 @@
+import os
+import socket
+import time
+from multiprocessing import Process
+
+import extractors
+from productfinder import NO_PAGE, ProductFinder
+from workqueue import open_queue, record_key, shard_records
+
+## Coordinator/worker mode. The coordinator shards CDX records by WARC
+## filename into a WorkQueue; workers on any node lease batches, extract
+## them and write results keyed by record, so retries merge cleanly.
+
+class LeaseLost(Exception):
+    pass
+
+
+class Coordinator:
+
+    def __init__(self, queue, batch_size=50):
+        self.queue = queue
+        self.batch_size = batch_size
+
+    def update(self, record_list):
+        batches = shard_records(record_list, self.batch_size)
+        print(f"[*] Sharded {len(record_list)} records into {len(batches)} batches.")
+        return self.queue.put_batches(batches)
+
+    def collect(self):
+        counts = self.queue.summary()
+        if counts['pending'] or counts['leased']:
+            print(f"[!] {counts['pending'] + counts['leased']} batches are unfinished; results are partial.")
+        if counts['dead']:
+            print(f"[!] {counts['dead']} batches ran out of attempts; their results are partial.")
+        products = self.queue.results()
+        print(f"[*] Merged {len(products)} products from {counts['done']} finished batches.")
+        # Fast-path hit rate across all workers
+        extractors.report(self.queue.outcomes())
+        return products
+
+
+class Worker:
+
+    def __init__(self, queue, worker_id=None, lease_seconds=300, idle_wait=0):
+        self.queue = queue
+        self.worker_id = worker_id or "{}-{}".format(socket.gethostname(), os.getpid())
+        self.lease_seconds = lease_seconds
+        # Seconds to keep polling while other workers hold leases (0 = exit at once,
+        # None = keep polling until every batch is done or dead)
+        self.idle_wait = idle_wait
+        self.finder = ProductFinder([])
+
+    def process(self, batch):
+        # Returns (results, outcomes, number of records whose page could not be fetched)
+        results = {}
+        outcomes = {}
+        missing = 0
+        for record in batch['records']:
+            # Renew before every record so slow batches keep their lease
+            if not self.queue.extend_lease(batch['batch_id'], self.worker_id, self.lease_seconds):
+                raise LeaseLost(batch['batch_id'])
+            product, outcome = self.finder.find_with_outcome(record)
+            if outcome == NO_PAGE:
+                missing += 1
+                continue
+            if outcome:
+                outcomes[record_key(record)] = outcome
+            if product:
+                results[record_key(record)] = product.ReturnJson()
+        return results, outcomes, missing
+
+    def update(self):
+        done = 0
+        idle_since = None
+        while True:
+            batch = self.queue.lease(self.worker_id, self.lease_seconds)
+            if batch is None:
+                if self.queue.pending() == 0:
+                    break
+                # Other workers still hold leases; wait in case one expires
+                idle_since = idle_since or time.time()
+                if self.idle_wait is not None and time.time() - idle_since > self.idle_wait:
+                    break
+                time.sleep(1)
+                continue
+            idle_since = None
+
+            print(f"[*] {self.worker_id} leased batch {batch['batch_id']} ({len(batch['records'])} records, {batch['shard']})")
+            try:
+                results, outcomes, missing = self.process(batch)
+            except LeaseLost:
+                print(f"[!] {self.worker_id} lost the lease on {batch['batch_id']}; abandoning it")
+                continue
+            except Exception as e:
+                print(f"[!] {self.worker_id} failed batch {batch['batch_id']}: {e}")
+                self.queue.fail(batch['batch_id'], self.worker_id, e)
+                continue
+
+            if missing:
+                # Fetch failures (e.g. throttling) are retried; what did succeed is kept
+                error = f"{missing} of {len(batch['records'])} pages could not be fetched"
+                print(f"[!] {self.worker_id} batch {batch['batch_id']}: {error}; returning it to the queue")
+                self.queue.fail(batch['batch_id'], self.worker_id, error, results, outcomes)
+                continue
+            if not self.queue.complete(batch['batch_id'], self.worker_id, results, outcomes):
+                print(f"[!] {self.worker_id} lost the lease on {batch['batch_id']}; discarding its results")
+                continue
+            done += 1
+
+        print(f"[*] {self.worker_id} finished {done} batches.")
+        extractors.report()
+        return done
+
+
+def run_worker(queue_url, worker_id=None, lease_seconds=300, idle_wait=0):
+    # Process entry point; every worker opens its own connection to the queue
+    queue = open_queue(queue_url, create=False)
+    try:
+        return Worker(queue, worker_id, lease_seconds, idle_wait).update()
+    finally:
+        queue.close()
+
+
+def run_local_workers(queue_url, num_workers=4, lease_seconds=300):
+    # Local workers poll until the queue drains, so a batch leased by a worker
+    # that crashed is picked up again once its lease expires.
+    processes = []
+    for i in range(num_workers):
+        worker_id = "{}-local-{}".format(socket.gethostname(), i)
+        p = Process(target=run_worker, args=(queue_url, worker_id, lease_seconds, None))
+        p.start()
+        processes.append(p)
+
+    failed = 0
+    for p in processes:
+        p.join()
+        if p.exitcode != 0:
+            print(f"[!] Worker {p.name} exited with code {p.exitcode}")
+            failed += 1
+    print(f"[*] {num_workers} local workers exited ({failed} failed).")
+    return failed
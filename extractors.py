@@ -0,0 +1,267 @@
+import json
+import math
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+from product import Product
+import productfinder_helper
+
+## Per-domain extractor registry. Each record URL is routed to the extractor
+## registered for its domain. Product data embedded as JSON-LD / inline JSON
+## in <script> tags is tried first (plain string scan + json.loads); the DOM
+## extractor only runs when that fast path finds nothing.
+
+JSON_SCRIPT = re.compile(
+    r'<script[^>]*type=["\']application/(?:ld\+)?json["\'][^>]*>(.*?)</script\s*>',
+    re.S | re.I)
+
+# Case-insensitive pre-check that scans the page without copying it
+JSON_SCRIPT_HINT = re.compile(r'application/(?:ld\+)?json', re.I)
+
+ASIN_IN_URL = re.compile(r'/dp/([A-Z0-9]{10})')
+
+# (source_domain, outcome) -> count, outcome is 'fast_path', 'dom' or 'failed'
+stats = Counter()
+
+
+def iter_json_scripts(html_content):
+    # Cheap check first: most pages without structured data bail out here
+    if not JSON_SCRIPT_HINT.search(html_content):
+        return
+    for match in JSON_SCRIPT.finditer(html_content):
+        try:
+            yield json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+
+
+def find_node(data, predicate):
+    # Depth-first search through nested JSON for the first dict matching predicate
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if predicate(node):
+                return node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def is_product_node(node):
+    node_type = node.get('@type')
+    if isinstance(node_type, list):
+        return 'Product' in node_type
+    return node_type == 'Product'
+
+
+def format_price(raw):
+    try:
+        value = float(str(raw).replace('$', '').replace(',', '').strip())
+    except ValueError:
+        return None
+    # float() happily parses "nan" and "Infinity"
+    return f"${value:.2f}" if math.isfinite(value) else None
+
+
+def asin_from_url(url):
+    match = ASIN_IN_URL.search(url)
+    return match.group(1) if match else None
+
+
+class Extractor:
+    source_domain = "generic"
+    # Common product-page path shapes for retailers without their own extractor
+    product_markers = ("/dp/", "/ip/", "/p/", "/product/", "/products/")
+
+    def is_product_url(self, url):
+        return any(marker in url for marker in self.product_markers)
+
+    def structured_matchers(self):
+        # (predicate, builder) pairs tried on every JSON node, in priority order
+        return [(is_product_node, self.from_json_ld)]
+
+    def structured(self, html_content, url):
+        # Fast path: every script blob is parsed once and searched once for any
+        # of the matchers (schema.org Product in JSON-LD for the base class)
+        matchers = self.structured_matchers()
+        for data in iter_json_scripts(html_content):
+            node = find_node(data, lambda n: any(predicate(n) for predicate, _ in matchers))
+            if node is None:
+                continue
+            for predicate, builder in matchers:
+                if predicate(node):
+                    product = builder(node, url)
+                    if product:
+                        return product
+                    break
+        return None
+
+    def from_json_ld(self, node, url):
+        product = Product()
+        product.SetUrl(url)
+        product.SetSourceDomain(self.source_domain)
+        if node.get('name'):
+            product.SetTitle(str(node['name']))
+
+        offers = node.get('offers') or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        price = offers.get('price', offers.get('lowPrice')) if isinstance(offers, dict) else None
+        if price is not None and format_price(price):
+            product.SetPrice(format_price(price))
+
+        rating = node.get('aggregateRating') or {}
+        if isinstance(rating, dict):
+            count = str(rating.get('reviewCount', rating.get('ratingCount', ''))).replace(",", "")
+            if count.isdigit():
+                product.SetRating(count)
+
+        brand = node.get('brand')
+        if isinstance(brand, dict):
+            brand = brand.get('name')
+        if brand:
+            product.SetBrand(str(brand))
+
+        sid = node.get('sku') or node.get('productID') or node.get('gtin13') or node.get('mpn') or url
+        product.SetSourceID(str(sid))
+        return product if product.price != "e" else None
+
+    def dom(self, html_content, url):
+        # Generic DOM fallback: schema.org microdata and Open Graph price tags
+        from bs4 import BeautifulSoup
+        parser = BeautifulSoup(html_content, "html.parser")
+        errs = []
+        product = Product()
+        product.SetUrl(url)
+        product.SetSourceDomain(self.source_domain)
+
+        title_tag = parser.find(attrs={"itemprop": "name"}) or parser.find("meta", attrs={"property": "og:title"})
+        if title_tag:
+            product.SetTitle(title_tag.get("content") or title_tag.get_text(strip=True))
+        else:
+            errs.append("Could not find Title")
+
+        price_tag = parser.find(attrs={"itemprop": "price"}) or \
+            parser.find("meta", attrs={"property": "product:price:amount"})
+        price = format_price(price_tag.get("content") or price_tag.get_text(strip=True)) if price_tag else None
+        if price:
+            product.SetPrice(price)
+        else:
+            errs.append("Could not find valid Price")
+
+        product.SetSourceID(url)
+        if product.FormCompleted():
+            return (product, errs)
+        return (False, errs)
+
+    def extract(self, html_content, url):
+        product, errs, _ = self.extract_with_outcome(html_content, url)
+        return (product, errs)
+
+    def extract_with_outcome(self, html_content, url):
+        # Also returns (source_domain, outcome) so callers can aggregate hit rates
+        product = self.structured(html_content, url)
+        if product:
+            errs, outcome = [], 'fast_path'
+        else:
+            product, errs = self.dom(html_content, url)
+            outcome = 'dom' if product else 'failed'
+        stats[(self.source_domain, outcome)] += 1
+        return (product, errs, (self.source_domain, outcome))
+
+
+class AmazonExtractor(Extractor):
+    source_domain = "amazon"
+    product_markers = ("/dp/",)
+
+    def from_json_ld(self, node, url):
+        product = super().from_json_ld(node, url)
+        # Use the ASIN like the DOM path does, so both paths give the same uid
+        asin = asin_from_url(url)
+        if product and asin:
+            product.SetSourceID(asin)
+        return product
+
+    def dom(self, html_content, url):
+        return productfinder_helper.extract_product(html_content, url)
+
+
+class WalmartExtractor(Extractor):
+    source_domain = "walmart"
+    product_markers = ("/ip/",)
+
+    def structured_matchers(self):
+        # Walmart's Next.js pages ship the product in inline __NEXT_DATA__ JSON
+        return super().structured_matchers() + [
+            (lambda n: 'usItemId' in n and 'priceInfo' in n, self.from_next_data)]
+
+    def from_next_data(self, node, url):
+        product = Product()
+        product.SetUrl(url)
+        product.SetSourceDomain(self.source_domain)
+        if node.get('name'):
+            product.SetTitle(str(node['name']))
+        current = (node.get('priceInfo') or {}).get('currentPrice') or {}
+        price = format_price(current.get('price')) if current.get('price') is not None else None
+        if price:
+            product.SetPrice(price)
+        count = str(node.get('numberOfReviews') or '')
+        if count.isdigit():
+            product.SetRating(count)
+        if node.get('brand'):
+            product.SetBrand(str(node['brand']))
+        product.SetSourceID(str(node['usItemId']))
+        return product if price else None
+
+
+EXTRACTORS = {}
+DEFAULT_EXTRACTOR = Extractor()
+
+
+def register(domain, extractor):
+    EXTRACTORS[domain] = extractor
+
+
+def get_extractor(url):
+    host = urlparse(url).netloc.lower().split(':')[0]
+    parts = host.split('.')
+    # Match the longest registered suffix, so www.amazon.com -> amazon.com
+    for i in range(len(parts) - 1):
+        extractor = EXTRACTORS.get('.'.join(parts[i:]))
+        if extractor:
+            return extractor
+    return DEFAULT_EXTRACTOR
+
+
+def is_product_url(url):
+    return get_extractor(url).is_product_url(url)
+
+
+def extract_product(html_content, url):
+    return get_extractor(url).extract(html_content, url)
+
+
+def extract_product_with_outcome(html_content, url):
+    return get_extractor(url).extract_with_outcome(html_content, url)
+
+
+def report(counts=None):
+    # Prints this process's counters, or the given (domain, outcome) counts
+    counts = stats if counts is None else counts
+    domains = sorted({domain for domain, _ in counts})
+    for domain in domains:
+        fast, dom, failed = (counts[(domain, k)] for k in ('fast_path', 'dom', 'failed'))
+        total = fast + dom + failed
+        print(f"[*] {domain}: {total} pages, fast path {fast} ({fast / total:.0%}), DOM fallback {dom}, failed {failed}")
+
+
+AMAZON_DOMAINS = ["amazon.com", "amazon.co.uk", "amazon.de", "amazon.fr", "amazon.it", "amazon.es",
+                  "amazon.ca", "amazon.co.jp", "amazon.com.au", "amazon.com.mx", "amazon.com.br",
+                  "amazon.in", "amazon.nl", "amazon.se", "amazon.pl", "amazon.sg", "amazon.ae"]
+
+for amazon_domain in AMAZON_DOMAINS:
+    register(amazon_domain, AmazonExtractor())
+register("walmart.com", WalmartExtractor())
@@ -1,27 +1,161 @@
-from productfinder import ProductFinder
-from save_local import SaveProducts
-from commoncrawler import search_domain, record_is_product, record_status_bad
+import argparse
+import json
+import os
 
-def main():
-    domain = "amazon.com"
-    index_list = ["2019-04"]
+## Command line entry point. Every subcommand imports what it needs when it
+## runs, so short commands and worker startup don't pay for requests/bs4.
+##
+##   python main.py index -d amazon.com        -> data/records.jsonl
+##   python main.py fetch                      -> data/pages.jsonl
+##   python main.py extract                    -> data/extracted.jsonl
+##   python main.py save                       -> data/products.json
+##   python main.py dashboard-prep             -> data/dashboard_products.json
+##   python main.py crawl [--role ...]         -> all of the above in one go
 
-    record_list = []
-    for index in index_list:
-        record_list += search_domain(domain, index)
+DEFAULT_INDEXES = ["2019-04"]
 
-    print(f"[*] Total raw records: {len(record_list)}")
+def cmd_index(args):
+    from commoncrawler import find_product_records
+    from save_local import write_jsonl
+    write_jsonl(find_product_records(args.domain, args.index or DEFAULT_INDEXES), args.output)
 
-    cleaned_list = list(filter(record_status_bad, record_list))
-    product_records = list(filter(record_is_product, cleaned_list))
+def cmd_fetch(args):
+    from productfinder import record_is_wanted
+    from productfinder_helper import download_page
+    from save_local import read_jsonl, write_jsonl
 
-    print(f"[*] Product pages found: {len(product_records)}")
+    def pages():
+        for record in read_jsonl(args.input):
+            if not record_is_wanted(record):
+                continue
+            html_content = download_page(record)
+            if html_content is not None:
+                yield {'record': record, 'html': html_content}
 
-    product_finder = ProductFinder(product_records)
-    products = product_finder.update()
+    write_jsonl(pages(), args.output)
 
-    saver = SaveProducts(products)
-    saver.update()
+def cmd_extract(args):
+    import extractors
+    from save_local import read_jsonl, write_jsonl
+
+    def products():
+        for page in read_jsonl(args.input):
+            product, errs = extractors.extract_product(page['html'], page['record']['url'])
+            if product:
+                product.SetCapture(page['record'])
+                yield product.ReturnJson()
+            else:
+                print(f"[!] Failed to EXTRACT {page['record']['url']}: {errs}")
+
+    write_jsonl(products(), args.output)
+    extractors.report()
+
+def cmd_save(args):
+    from save_local import SaveProducts, read_jsonl
+    SaveProducts(list(read_jsonl(args.input)), args.output).update()
+
+def cmd_dashboard_prep(args):
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        raise SystemExit("[!] dashboard-prep would overwrite its input; choose a different --output")
+    from save_local import SaveProducts, prepare_for_dashboard
+    with open(args.input) as f:
+        products = json.load(f)
+    SaveProducts(prepare_for_dashboard(products), args.output).update()
+
+def cmd_crawl(args):
+    index_list = args.index or DEFAULT_INDEXES
+
+    if args.role == "worker":
+        from distributed import run_worker
+        try:
+            run_worker(args.queue, lease_seconds=args.lease_seconds, idle_wait=args.idle_wait)
+        except (FileNotFoundError, ValueError) as e:
+            raise SystemExit(f"[!] {e}")
+        return
+
+    from save_local import SaveProducts
+
+    if args.role == "single":
+        import extractors
+        from commoncrawler import find_product_records
+        from productfinder import ProductFinder
+        product_finder = ProductFinder(find_product_records(args.domain, index_list))
+        products = product_finder.update()
+        extractors.report()
+    else:
+        from distributed import Coordinator, run_local_workers
+        from workqueue import open_queue
+        try:
+            # merge only reads an existing queue; coordinator/local create it
+            queue = open_queue(args.queue, create=args.role != "merge")
+        except (FileNotFoundError, ValueError) as e:
+            raise SystemExit(f"[!] {e}")
+        coordinator = Coordinator(queue, args.batch_size)
+        if args.role in ("coordinator", "local"):
+            from commoncrawler import find_product_records
+            coordinator.update(find_product_records(args.domain, index_list))
+        if args.role == "coordinator":
+            return
+        if args.role == "local":
+            run_local_workers(args.queue, args.workers, args.lease_seconds)
+        products = coordinator.collect()
+        queue.close()
+        if not products:
+            raise SystemExit(f"[!] No results in {args.queue}; not overwriting {args.output}")
+
+    SaveProducts(products, args.output).update()
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Dynamic Price Intelligence pipeline")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help="Query the Common Crawl index for product records")
+    p.add_argument("-d", "--domain", default="amazon.com", help="The domain to target ie. amazon.com")
+    p.add_argument("--index", action="append", help="Crawl index, e.g. 2019-04 (repeatable)")
+    p.add_argument("-o", "--output", default="data/records.jsonl")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("fetch", help="Download the WARC records listed by index")
+    p.add_argument("-i", "--input", default="data/records.jsonl")
+    p.add_argument("-o", "--output", default="data/pages.jsonl")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("extract", help="Extract products from fetched pages")
+    p.add_argument("-i", "--input", default="data/pages.jsonl")
+    p.add_argument("-o", "--output", default="data/extracted.jsonl")
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("save", help="Write extracted products to the products JSON file")
+    p.add_argument("-i", "--input", default="data/extracted.jsonl")
+    p.add_argument("-o", "--output", default="data/products.json")
+    p.set_defaults(func=cmd_save)
+
+    p = sub.add_parser("dashboard-prep", help="Clean products for the dashboard, keeping price history")
+    p.add_argument("-i", "--input", default="data/products.json")
+    p.add_argument("-o", "--output", default="data/dashboard_products.json")
+    p.set_defaults(func=cmd_dashboard_prep)
+
+    p = sub.add_parser("crawl", help="Run the whole pipeline, in one process or coordinator/worker mode")
+    p.add_argument("-d", "--domain", default="amazon.com", help="The domain to target ie. amazon.com")
+    p.add_argument("--index", action="append", help="Crawl index, e.g. 2019-04 (repeatable)")
+    p.add_argument("-o", "--output", default="data/products.json")
+    p.add_argument("--role", choices=["single", "coordinator", "worker", "merge", "local"], default="single",
+                   help="single: one process (default); coordinator: enqueue work; worker: process queued work; "
+                        "merge: save worker results; local: coordinator plus --workers local worker processes")
+    p.add_argument("--queue", default="data/queue.db",
+                   help="Work queue: a SQLite file path, or backend URL such as sqlite:///abs/queue.db")
+    p.add_argument("--workers", type=int, default=4, help="Number of worker processes for --role local")
+    p.add_argument("--batch-size", type=int, default=50, help="Max records per leased batch")
+    p.add_argument("--lease-seconds", type=int, default=300, help="Lease length before a batch is retried")
+    p.add_argument("--idle-wait", type=int, default=0,
+                   help="Seconds a worker keeps polling while other workers hold leases")
+    p.set_defaults(func=cmd_crawl)
+
+    return ap
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
 
 if __name__ == "__main__":
     main()
@@ -12,7 +12,9 @@ class Product:
     url = "e"
     image_url = "e"
     source_id = "asin"
-    source_domain = "amazon"
+    source_domain = "e"
+    timestamp = ""
+    record = ""
     
     ## Inti
     def __init__(self, product=None ):
@@ -54,6 +56,11 @@ class Product:
     
     def SetSourceDomain(self, domain):
         self.source_domain = domain
+
+    def SetCapture(self, record):
+        #CDX capture time and WARC location, so captures of the same page stay distinct
+        self.timestamp = record.get('timestamp', "")
+        self.record = "{}:{}".format(record['filename'], record['offset'])
     
     
     ## Support 
@@ -79,7 +86,9 @@ class Product:
             'url':        self.url,
             #'image_url':     self.image_url,
             'sid':        self.source_id,
-            #'domain':     self.source_domain,
+            'domain':     self.source_domain,
+            'timestamp':  self.timestamp, #Crawl capture time (CDX)
+            'record':     self.record,
             'date':       strftime("%Y-%m-%d %H:%M:%S", gmtime())
         }
         return (product)
@@ -1,47 +1,66 @@
-from bs4 import BeautifulSoup
 from product import Product
-import requests
 import json
 import re
 import productfinder_helper
+import extractors
 
 ## Edited and adapted from David Cedar(2017)
 
+NO_PAGE = "no_page"
+
+def record_is_wanted(record):
+    # Skip short, heavily escaped and redirect URLs
+    return len(record['url']) > 23 and record['url'].count('%') < 5 and record['url'].count('artist-redirect') < 1
+
+
 class ProductFinder:
     
-    record_list = list()
-    save_thread = list()
-    
     def __init__(self, record_list):
         self.record_list = record_list
+        self.save_thread = list()
+
+    def find(self, record):
+        # Download and extract a single CDX record; returns a Product or None
+        product, _ = self.find_with_outcome(record)
+        return product
+
+    def find_with_outcome(self, record):
+        # Returns (Product or None, outcome). outcome is None for skipped URLs,
+        # NO_PAGE when the download failed, else the extractor's (domain, outcome).
+        if not record_is_wanted(record):
+            return (None, None)
+
+        html_content = productfinder_helper.download_page(record)
+
+        if html_content is None:
+            print("[!] Skipping record: could not retrieve page content")
+            return (None, NO_PAGE)
+
+        print("[*] Retrieved {} bytes for {}".format(len(html_content), record['url']))
+
+        product, errs, outcome = extractors.extract_product_with_outcome(html_content, record['url'])
+        print("Product: ", product)
+        print("errs: ", errs)
+
+        if product:
+            product.SetCapture(record)
+            print("[Success Append]")
+            if errs:
+                print("[Errors:]")
+                for err in errs:
+                    print(" *  {}".format(err))
+            return (product, outcome)
+
+        print("Failed to EXTRACT Product")
+        return (None, outcome)
 
-    def update(self):  # ← This must be indented to be part of the class
+    def update(self):
         i = 0
         for record in self.record_list:
             i += 1
-            if len(record['url']) > 23 and record['url'].count('%') < 5 and record['url'].count('artist-redirect') < 1:
-                print("[{} of {}]".format(i, len(self.record_list)))
-
-                html_content = productfinder_helper.download_page(record)
-                
-                if html_content is None:
-                    print("[!] Skipping record: could not retrieve page content")
-                    continue
-
-                print("[*] Retrieved {} bytes for {}".format(len(html_content), record['url']))
-
-                product, errs = productfinder_helper.extract_product(html_content, record['url'])
-                print("Product: ", product)
-                print("errs: ", errs)
-
-                if product:
-                    self.save_thread.append(product)
-                    print("[Success Append]")
-                    if errs:
-                        print("[Errors:]")
-                        for err in errs:
-                            print(" *  {}".format(err))
-                else:
-                    print("Failed to EXTRACT Product")
+            print("[{} of {}]".format(i, len(self.record_list)))
+            product = self.find(record)
+            if product:
+                self.save_thread.append(product)
 
         return self.save_thread
@@ -1,14 +1,14 @@
-import requests
 import argparse
 import time
 import json
 from io import StringIO, BytesIO
 import gzip
-from bs4 import BeautifulSoup
 from product import Product
 import re
 
 def download_page(record):
+    import requests
+
     offset, length = int(record['offset']), int(record['length'])
     offset_end = offset + length - 1
 
@@ -87,6 +87,7 @@ def extract_product(html_content, url):
     string_buffer = ""
     errs = []
 
+    from bs4 import BeautifulSoup
     parser = BeautifulSoup(html_content, "html.parser")
 
     # Check if the page is a product
@@ -97,6 +98,7 @@ def extract_product(html_content, url):
 
     product = Product()
     product.SetUrl(url)
+    product.SetSourceDomain("amazon")
 
     # Title extraction
     title_tag = parser.find("span", attrs={"id": "productTitle"}) or parser.find("span", attrs={"id": "btAsinTitle"})
@@ -5,13 +5,58 @@ class SaveProducts:
     def __init__(self, products_buffer, save_path='data/products.json'):
         self.products_buffer = products_buffer
         self.save_path = save_path
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        if os.path.dirname(save_path):
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
 
     def update(self):
         print(f"[*] Saving {len(self.products_buffer)} products locally.")
-        product_dicts = [product.ReturnJson() for product in self.products_buffer]
+        # Accepts Product objects or dicts already produced by ReturnJson (e.g. merged worker results)
+        product_dicts = [product if isinstance(product, dict) else product.ReturnJson()
+                         for product in self.products_buffer]
 
         with open(self.save_path, 'w') as f:
             json.dump(product_dicts, f, indent=2)
 
         print(f"[✔] Saved to {self.save_path}")
+
+
+def write_jsonl(rows, path):
+    # One JSON object per line; used to hand data between CLI subcommands
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with open(path, 'w') as f:
+        for row in rows:
+            json.dump(row, f)
+            f.write("\n")
+            count += 1
+    print(f"[✔] Wrote {count} rows to {path}")
+    return count
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def prepare_for_dashboard(product_dicts):
+    # Drop rows without a usable price and exact repeats of the same capture
+    # (same WARC record). Every other observation is kept, since the dashboard
+    # plots each product's price over time. 'date' is the extraction time, so
+    # it only identifies a capture for older files that lack 'record'.
+    seen = set()
+    kept = []
+    for product in product_dicts:
+        try:
+            float(str(product.get('price', '')).replace('$', '').replace(',', ''))
+        except ValueError:
+            continue
+        key = product.get('record') or (product.get('url'), product.get('timestamp') or product.get('date'))
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(product)
+    print(f"[*] Kept {len(kept)} of {len(product_dicts)} products for the dashboard.")
+    return kept
@@ -0,0 +1,50 @@
+from distributed import Coordinator, Worker
+from productfinder import NO_PAGE
+from workqueue import SQLiteWorkQueue
+
+
+class StubProduct:
+
+    def __init__(self, url):
+        self.url = url
+
+    def ReturnJson(self):
+        return {'uid': self.url, 'url': self.url}
+
+
+class StubFinder:
+    # Stands in for ProductFinder so no pages are downloaded
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+
+    def find_with_outcome(self, record):
+        if record['url'] in self.missing:
+            return (None, NO_PAGE)
+        return (StubProduct(record['url']), ('amazon', 'fast_path'))
+
+
+def make_coordinator(tmp_path, records=4):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    coordinator = Coordinator(queue, batch_size=2)
+    coordinator.update([{'filename': 'a.warc.gz', 'offset': str(i), 'url': f'u{i}'} for i in range(records)])
+    return queue, coordinator
+
+
+def test_worker_completes_batches_and_reports_outcomes(tmp_path):
+    queue, coordinator = make_coordinator(tmp_path)
+    worker = Worker(queue, "w1")
+    worker.finder = StubFinder()
+    assert worker.update() == 2
+    assert [p['url'] for p in coordinator.collect()] == ['u0', 'u1', 'u2', 'u3']
+    assert queue.outcomes() == {('amazon', 'fast_path'): 4}
+
+
+def test_fetch_failures_return_batch_to_queue(tmp_path):
+    queue, coordinator = make_coordinator(tmp_path, records=2)
+    worker = Worker(queue, "w1")
+    worker.finder = StubFinder(missing={'u1'})
+    assert worker.update() == 0
+    # Retried until out of attempts, keeping the page that did work
+    assert queue.summary()['dead'] == 1
+    assert [p['url'] for p in coordinator.collect()] == ['u0']
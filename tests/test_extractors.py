@@ -0,0 +1,37 @@
+import extractors
+
+
+def test_product_url_filter():
+    assert extractors.is_product_url("https://www.amazon.co.uk/Widget/dp/B000000001")
+    assert not extractors.is_product_url("https://www.amazon.co.uk/gp/help/customer")
+    assert not extractors.is_product_url("https://www.target.com/about-us")
+    assert extractors.is_product_url("https://www.walmart.com/ip/Soap/555")
+
+
+def test_json_ld_fast_path_is_case_insensitive_and_uses_asin():
+    html = ('<SCRIPT TYPE="APPLICATION/LD+JSON">{"@type": "Product", "name": "Widget", '
+            '"offers": {"price": "1,234.5"}}</SCRIPT>')
+    product, errs = extractors.extract_product(html, "https://www.amazon.de/Widget/dp/B000000001")
+    assert product.price == "$1234.50"
+    assert product.source_id == "B000000001"
+    assert product.source_domain == "amazon"
+    assert errs == []
+
+
+def test_format_price_rejects_non_finite():
+    assert extractors.format_price("$12") == "$12.00"
+    assert extractors.format_price("nan") is None
+    assert extractors.format_price("Infinity") is None
+    assert extractors.format_price("n/a") is None
+
+
+def test_walmart_next_data_is_parsed_once(monkeypatch):
+    calls = []
+    real_loads = extractors.json.loads
+    monkeypatch.setattr(extractors.json, "loads", lambda s: calls.append(s) or real_loads(s))
+    html = ('<script id="__NEXT_DATA__" type="application/json">{"props": {"product": {"usItemId": "555", '
+            '"name": "Soap", "priceInfo": {"currentPrice": {"price": 3.5}}}}}</script>')
+    product, errs = extractors.extract_product(html, "https://www.walmart.com/ip/Soap/555")
+    assert product.price == "$3.50"
+    assert product.source_id == "555"
+    assert len(calls) == 1
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+from save_local import write_jsonl
+
+
+def test_library_imports_are_cheap_and_side_effect_free():
+    # An unknown argv flag would make any module-level argparse exit non-zero
+    code = ("import sys, commoncrawler, productfinder, productfinder_helper, distributed, extractors; "
+            "print(sorted(m for m in ('requests', 'bs4', 'urllib3') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code, "--bogus"], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(main.__file__)), check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_save_and_dashboard_prep_round_trip(tmp_path):
+    extracted = str(tmp_path / "extracted.jsonl")
+    products = str(tmp_path / "products.json")
+    prepared = str(tmp_path / "dashboard_products.json")
+    rows = [
+        {'uid': 'a', 'url': 'u', 'price': '$3.00', 'record': 'f1:0', 'date': 'd'},
+        {'uid': 'a', 'url': 'u', 'price': '$5.00', 'record': 'f2:0', 'date': 'd'},
+        {'uid': 'b', 'url': 'v', 'price': 'e', 'record': 'f3:0', 'date': 'd'},
+    ]
+    write_jsonl(rows, extracted)
+
+    main.main(["save", "-i", extracted, "-o", products])
+    with open(products) as f:
+        assert json.load(f) == rows
+
+    main.main(["dashboard-prep", "-i", products, "-o", prepared])
+    with open(prepared) as f:
+        assert [r['price'] for r in json.load(f)] == ['$3.00', '$5.00']
+
+    with pytest.raises(SystemExit):
+        main.main(["dashboard-prep", "-i", products, "-o", products])
@@ -0,0 +1,39 @@
+import extractors
+import product
+from save_local import prepare_for_dashboard, read_jsonl, write_jsonl
+
+URL = "https://www.amazon.com/Widget/dp/B000000001"
+
+
+def extracted_row(price, filename, timestamp):
+    html = '<script type="application/ld+json">{"@type": "Product", "name": "Widget", ' \
+           '"offers": {"price": "%s"}}</script>' % price
+    item, _ = extractors.extract_product(html, URL)
+    item.SetCapture({'filename': filename, 'offset': '0', 'timestamp': timestamp})
+    return item.ReturnJson()
+
+
+def test_prepare_for_dashboard_keeps_price_history(monkeypatch):
+    # Both captures are extracted within the same second, as in a real run
+    monkeypatch.setattr(product, "strftime", lambda fmt, t: "2025-01-01 00:00:00")
+    rows = [
+        extracted_row("3.00", "CC-MAIN-2019-04.warc.gz", "20190120000000"),
+        extracted_row("5.00", "CC-MAIN-2020-16.warc.gz", "20200401000000"),
+    ]
+    rows.append(dict(rows[1]))
+    assert rows[0]['date'] == rows[1]['date'] and rows[0]['uid'] == rows[1]['uid']
+    kept = prepare_for_dashboard(rows)
+    assert [r['price'] for r in kept] == ['$3.00', '$5.00']
+    assert [r['timestamp'] for r in kept] == ['20190120000000', '20200401000000']
+
+
+def test_prepare_for_dashboard_drops_invalid_prices():
+    rows = [{'uid': 'b', 'url': 'v', 'price': 'e', 'date': '2020-01-01'}]
+    assert prepare_for_dashboard(rows) == []
+
+
+def test_jsonl_round_trip(tmp_path):
+    rows = [{'a': 1}, {'b': [2, 3]}]
+    path = str(tmp_path / "rows.jsonl")
+    assert write_jsonl(iter(rows), path) == 2
+    assert list(read_jsonl(path)) == rows
@@ -0,0 +1,90 @@
+import pytest
+
+from workqueue import SQLiteWorkQueue, open_queue, shard_records, record_key
+
+
+def make_queue(tmp_path, records=4, batch_size=2, max_attempts=3):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=max_attempts)
+    record_list = [{'filename': 'a.warc.gz', 'offset': str(i * 100), 'url': f'u{i}'} for i in range(records)]
+    queue.put_batches(shard_records(record_list, batch_size))
+    return queue
+
+
+def test_put_batches_is_idempotent(tmp_path):
+    queue = make_queue(tmp_path)
+    records = [{'filename': 'a.warc.gz', 'offset': str(i * 100), 'url': f'u{i}'} for i in range(4)]
+    assert queue.put_batches(shard_records(records, 2)) == 0
+    assert queue.pending() == 2
+
+
+def test_lease_is_exclusive_until_expiry(tmp_path):
+    queue = make_queue(tmp_path, records=2)
+    batch = queue.lease("w1", lease_seconds=300)
+    assert batch is not None
+    assert queue.lease("w2") is None
+    assert queue.pending() == 1
+
+
+def test_expired_lease_is_retried_and_stale_worker_ignored(tmp_path):
+    queue = make_queue(tmp_path, records=2)
+    batch = queue.lease("w1", lease_seconds=-1)
+    retry = queue.lease("w2")
+    assert retry['batch_id'] == batch['batch_id']
+
+    # w1 lost its lease: neither its failure nor its results may touch the batch
+    queue.fail(batch['batch_id'], "w1", "boom")
+    assert queue.lease("w3") is None
+    assert not queue.complete(batch['batch_id'], "w1", {'stale': {'uid': 'x'}})
+
+    results = {record_key(r): {'uid': 'same', 'url': r['url']} for r in retry['records']}
+    assert queue.complete(retry['batch_id'], "w2", results)
+    assert queue.pending() == 0
+    # One row per record, even when both captures share a uid
+    assert [p['url'] for p in queue.results()] == ['u0', 'u1']
+
+
+def test_batch_dies_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, records=2, max_attempts=2)
+    for worker_id in ("w1", "w2"):
+        batch = queue.lease(worker_id)
+        queue.fail(batch['batch_id'], worker_id, "boom")
+    assert queue.lease("w3") is None
+    assert queue.pending() == 0
+    assert queue.summary() == {'done': 0, 'pending': 0, 'leased': 0, 'dead': 1}
+
+
+def test_outcomes_are_counted_once_per_record(tmp_path):
+    queue = make_queue(tmp_path, records=2)
+    stale = queue.lease("w1", lease_seconds=-1)
+    batch = queue.lease("w2")
+    outcomes = {record_key(r): ('amazon', 'fast_path') for r in batch['records']}
+    assert not queue.complete(stale['batch_id'], "w1", {}, outcomes)
+    assert queue.complete(batch['batch_id'], "w2", {}, outcomes)
+    assert queue.outcomes() == {('amazon', 'fast_path'): 2}
+
+
+def test_extend_lease_keeps_batch_from_being_re_leased(tmp_path):
+    queue = make_queue(tmp_path, records=2)
+    batch = queue.lease("w1", lease_seconds=-1)
+    assert queue.extend_lease(batch['batch_id'], "w1", 300)
+    assert queue.lease("w2") is None
+    assert not queue.extend_lease(batch['batch_id'], "w2", 300)
+
+
+def test_fail_keeps_partial_results(tmp_path):
+    queue = make_queue(tmp_path, records=2)
+    batch = queue.lease("w1")
+    first = record_key(batch['records'][0])
+    assert queue.fail(batch['batch_id'], "w1", "1 of 2 pages could not be fetched", {first: {'uid': 'a'}})
+    assert queue.pending() == 1
+    assert queue.results() == [{'uid': 'a'}]
+
+
+def test_open_queue(tmp_path):
+    path = str(tmp_path / "missing.db")
+    with pytest.raises(FileNotFoundError):
+        open_queue(path, create=False)
+    with pytest.raises(ValueError):
+        open_queue("nosuch://host/0")
+    assert isinstance(open_queue("sqlite://" + path), SQLiteWorkQueue)
+    open_queue(path, create=False).close()
@@ -0,0 +1,254 @@
+import json
+import os
+import sqlite3
+import hashlib
+import time
+from collections import Counter, OrderedDict
+
+## Durable work queue shared by the coordinator and worker processes.
+## WorkQueue defines the interface; SQLiteWorkQueue is the local backend.
+## Another service (e.g. Redis) can be dropped in by subclassing WorkQueue
+## and calling register_backend("redis", RedisWorkQueue); open_queue() then
+## resolves "redis://..." queue URLs to it. Plain paths mean SQLite.
+## SQLiteWorkQueue is single-host: WAL mode needs shared memory, so every
+## worker must run on the machine that holds the queue file.
+
+def record_key(record):
+    # A CDX record is uniquely addressed by its WARC file and byte offset
+    return "{}:{}".format(record['filename'], record['offset'])
+
+
+def shard_records(record_list, batch_size=50):
+    # Group records by WARC filename so every batch only touches one file,
+    # then order each shard by offset so neighbouring ranges stay together.
+    shards = OrderedDict()
+    for record in record_list:
+        shards.setdefault(record['filename'], []).append(record)
+
+    batches = []
+    for filename, records in shards.items():
+        records.sort(key=lambda r: int(r['offset']))
+        for start in range(0, len(records), batch_size):
+            chunk = records[start:start + batch_size]
+            m = hashlib.md5()
+            for record in chunk:
+                m.update(record_key(record).encode('utf-8'))
+            batches.append({'batch_id': m.hexdigest(), 'shard': filename, 'records': chunk})
+    return batches
+
+
+class WorkQueue:
+
+    def put_batches(self, batches):
+        # Enqueue batches; batches already present are left untouched
+        raise NotImplementedError
+
+    def lease(self, worker_id, lease_seconds=300):
+        # Return one pending (or lease-expired) batch dict, or None
+        raise NotImplementedError
+
+    def complete(self, batch_id, worker_id, results, outcomes=None):
+        # Store {record_key: product_json} results and optional
+        # {record_key: (source_domain, outcome)} extraction outcomes, then mark
+        # the batch done. Returns False (and stores nothing) if worker_id no
+        # longer holds the lease.
+        raise NotImplementedError
+
+    def extend_lease(self, batch_id, worker_id, lease_seconds=300):
+        # Push the lease expiry out; returns False if worker_id no longer holds it
+        raise NotImplementedError
+
+    def fail(self, batch_id, worker_id, error, results=None, outcomes=None):
+        # Give the batch back to the queue so another worker can retry it,
+        # keeping any results the worker did manage to produce
+        raise NotImplementedError
+
+    def pending(self):
+        # Number of batches still to be processed
+        raise NotImplementedError
+
+    def summary(self):
+        # {'done': n, 'pending': n, 'leased': n, 'dead': n} batch counts
+        raise NotImplementedError
+
+    def results(self):
+        # Merged product dicts, one per record
+        raise NotImplementedError
+
+    def outcomes(self):
+        # Counter of (source_domain, outcome) across all finished records
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class SQLiteWorkQueue(WorkQueue):
+
+    def __init__(self, path='data/queue.db', max_attempts=3, create=True):
+        self.path = path
+        self.max_attempts = max_attempts
+        # Workers and merge must not silently start from an empty queue
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"Work queue {path} does not exist")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode; writes take an explicit IMMEDIATE lock so that
+        # concurrent worker processes never lease the same batch.
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id      TEXT PRIMARY KEY,
+                shard         TEXT NOT NULL,
+                records       TEXT NOT NULL,
+                status        TEXT NOT NULL DEFAULT 'pending',
+                worker_id     TEXT,
+                lease_expires REAL,
+                attempts      INTEGER NOT NULL DEFAULT 0,
+                error         TEXT
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                record_key TEXT PRIMARY KEY,
+                batch_id   TEXT NOT NULL,
+                product    TEXT NOT NULL
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outcomes (
+                record_key    TEXT PRIMARY KEY,
+                source_domain TEXT NOT NULL,
+                outcome       TEXT NOT NULL
+            )""")
+
+    def put_batches(self, batches):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO batches (batch_id, shard, records) VALUES (?, ?, ?)",
+                [(b['batch_id'], b['shard'], json.dumps(b['records'])) for b in batches])
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        print(f"[*] Queued {added} new batches ({len(batches) - added} already present).")
+        return added
+
+    def lease(self, worker_id, lease_seconds=300):
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT batch_id, shard, records FROM batches "
+                "WHERE attempts < ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY rowid LIMIT 1",
+                (self.max_attempts, now)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE batches SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE batch_id = ?",
+                (worker_id, now + lease_seconds, row[0]))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {'batch_id': row[0], 'shard': row[1], 'records': json.loads(row[2])}
+
+    def extend_lease(self, batch_id, worker_id, lease_seconds=300):
+        cursor = self.conn.execute(
+            "UPDATE batches SET lease_expires = ? WHERE batch_id = ? AND status = 'leased' AND worker_id = ?",
+            (time.time() + lease_seconds, batch_id, worker_id))
+        return cursor.rowcount == 1
+
+    def finish(self, batch_id, worker_id, results, outcomes, status, error):
+        # Shared by complete() and fail(); only the current lease holder may write
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT status, worker_id FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+            if row is None or row[0] != 'leased' or row[1] != worker_id:
+                # Our lease expired and the batch was re-leased or finished elsewhere
+                self.conn.execute("COMMIT")
+                return False
+            # Keyed on the record, so re-processing a batch overwrites rather than duplicates
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (record_key, batch_id, product) VALUES (?, ?, ?)",
+                [(key, batch_id, json.dumps(product)) for key, product in (results or {}).items()])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO outcomes (record_key, source_domain, outcome) VALUES (?, ?, ?)",
+                [(key, domain, outcome) for key, (domain, outcome) in (outcomes or {}).items()])
+            self.conn.execute(
+                "UPDATE batches SET status = ?, worker_id = CASE WHEN ? = 'done' THEN worker_id END, "
+                "lease_expires = NULL, error = ? WHERE batch_id = ?",
+                (status, status, error, batch_id))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def complete(self, batch_id, worker_id, results, outcomes=None):
+        return self.finish(batch_id, worker_id, results, outcomes, 'done', None)
+
+    def fail(self, batch_id, worker_id, error, results=None, outcomes=None):
+        return self.finish(batch_id, worker_id, results, outcomes, 'pending', str(error))
+
+    def pending(self):
+        # Batches that ran out of attempts are dead and no longer count
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM batches WHERE status != 'done' "
+            "AND (attempts < ? OR (status = 'leased' AND lease_expires >= ?))",
+            (self.max_attempts, time.time())).fetchone()
+        return row[0]
+
+    def summary(self):
+        now = time.time()
+        counts = {'done': 0, 'pending': 0, 'leased': 0, 'dead': 0}
+        for status, attempts, lease_expires in self.conn.execute(
+                "SELECT status, attempts, lease_expires FROM batches"):
+            if status == 'leased' and lease_expires >= now:
+                counts['leased'] += 1
+            elif status != 'done' and attempts >= self.max_attempts:
+                counts['dead'] += 1
+            elif status == 'done':
+                counts['done'] += 1
+            else:
+                counts['pending'] += 1
+        return counts
+
+    def results(self):
+        # One row per record, so repeated captures of a product keep their price history
+        return [json.loads(product) for (product,) in
+                self.conn.execute("SELECT product FROM results ORDER BY record_key")]
+
+    def outcomes(self):
+        return Counter({(domain, outcome): count for domain, outcome, count in self.conn.execute(
+            "SELECT source_domain, outcome, COUNT(*) FROM outcomes GROUP BY source_domain, outcome")})
+
+    def close(self):
+        self.conn.close()
+
+
+QUEUE_BACKENDS = {}
+
+
+def register_backend(scheme, factory):
+    # factory(location, create=...) -> WorkQueue
+    QUEUE_BACKENDS[scheme] = factory
+
+
+def open_queue(url, create=True):
+    # "sqlite:///abs/queue.db", "redis://host/0", or a plain SQLite file path
+    scheme, sep, location = url.partition('://')
+    if not sep:
+        scheme, location = 'sqlite', url
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown work queue backend: {scheme}")
+    return QUEUE_BACKENDS[scheme](location, create=create)
+
+
+register_backend('sqlite', SQLiteWorkQueue)